@@ -1,8 +1,14 @@
+import bisect
+import functools
+from enum import IntEnum
+from io import BytesIO
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the plain kernel
+    njit = None
 
 # Page configuration
 st.set_page_config(
@@ -12,8 +18,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling, parsed once at import
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -34,78 +40,215 @@ st.markdown("""
     .obese { background-color: #f8d7da; color: #721c24; }
     .underweight { background-color: #e2e3e5; color: #383d41; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Re-emitted on every run: Streamlit drops elements that aren't re-sent,
+# so a once-per-session guard would strip the styling on the next rerun
+st.markdown(_CSS, unsafe_allow_html=True)
+
+class Units(IntEnum):
+    METRIC = 0
+    IMPERIAL = 1
+
+# Radio labels resolved to Units once at the UI layer, so the math below
+# indexes an int instead of comparing strings per call
+_UNITS_BY_LABEL = {
+    "Metric (kg, cm)": Units.METRIC,
+    "Imperial (lbs, inches)": Units.IMPERIAL
+}
+
+# bmi = factor * weight / height^2 (kg/cm and lbs/inches respectively)
+_BMI_FACTORS = (1e4, 703.0)
+
+# Static lookup tables, built once at import instead of per call/instance
+BMI_CATEGORIES = {
+    "Underweight": (0, 18.4),
+    "Normal weight": (18.5, 24.9),
+    "Overweight": (25, 29.9),
+    "Obesity Class I": (30, 34.9),
+    "Obesity Class II": (35, 39.9),
+    "Obesity Class III": (40, float('inf'))
+}
+
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary": 1.2,
+    "Lightly active": 1.375,
+    "Moderately active": 1.55,
+    "Very active": 1.725,
+    "Extremely active": 1.9
+}
+
+# Reference lines and shaded (lo, hi, color, label) bands for the trend chart
+_BMI_REF_LINES = ([18.5, 24.9, 29.9], ['red', 'green', 'orange'])
+_BMI_BANDS = (
+    (0, 18.4, 'red', 'Underweight Range'),
+    (18.5, 24.9, 'green', 'Healthy Range'),
+    (25, 29.9, 'orange', 'Overweight Range'),
+    (30, 40, 'darkred', 'Obesity Range')
+)
+
+# Macro breakdown rendered as one markdown element instead of three
+# st.metric widgets, so the page sends a single frontend message
+_MACRO_HTML = """
+<div style="display:flex; text-align:center; margin:1rem 0;">
+    <div style="flex:1;">
+        <div style="font-size:0.9rem; color:#555;">Protein</div>
+        <div style="font-size:1.8rem; font-weight:bold;">{protein_grams}g</div>
+        <div style="color:#09ab3b;">30%</div>
+    </div>
+    <div style="flex:1;">
+        <div style="font-size:0.9rem; color:#555;">Carbohydrates</div>
+        <div style="font-size:1.8rem; font-weight:bold;">{carbs_grams}g</div>
+        <div style="color:#09ab3b;">50%</div>
+    </div>
+    <div style="flex:1;">
+        <div style="font-size:0.9rem; color:#555;">Fat</div>
+        <div style="font-size:1.8rem; font-weight:bold;">{fat_grams}g</div>
+        <div style="color:#09ab3b;">20%</div>
+    </div>
+</div>
+"""
+
+# Static category table shown on the BMI page; the range strings are
+# formatted once here at import, never on the click path
+_BMI_TABLE = tuple(
+    {"Category": category, "BMI Range": f"{min_bmi}-{max_bmi}"}
+    for category, (min_bmi, max_bmi) in BMI_CATEGORIES.items()
+)
+
+# BMI category to result-box CSS class, one hash lookup on the click path
+_CATEGORY_CSS = {
+    "Underweight": "underweight",
+    "Normal weight": "healthy",
+    "Overweight": "overweight",
+    "Obesity Class I": "overweight",
+    "Obesity Class II": "obese",
+    "Obesity Class III": "obese"
+}
+
+# Sorted category upper bounds for bisect-based lookup in get_bmi_category
+_BMI_BOUNDS = (18.5, 25.0, 30.0, 35.0, 40.0, float('inf'))
+_BMI_NAMES = ("Underweight", "Normal weight", "Overweight",
+              "Obesity Class I", "Obesity Class II", "Obesity Class III")
+
+GOAL_ADJUSTMENTS = {
+    "Lose weight": -500,
+    "Maintain weight": 0,
+    "Gain weight": 500
+}
+
+# Integer codes for the BMR kernel, derived from the lookup tables above
+_GENDER_CODES = {"Male": 0, "Female": 1}
+_ACTIVITY_INDEX = {name: i for i, name in enumerate(ACTIVITY_MULTIPLIERS)}
+_GOAL_INDEX = {name: i for i, name in enumerate(GOAL_ADJUSTMENTS)}
+_ACTIVITY_FACTORS = tuple(ACTIVITY_MULTIPLIERS.values())
+_GOAL_DELTAS = tuple(float(v) for v in GOAL_ADJUSTMENTS.values())
+
+def _bmr_kernel(age, weight, height, gender_code, act_idx, goal_idx):
+    """Mifflin-St Jeor BMR scaled by activity and goal, in int/float codes"""
+    bmr = 10.0 * weight + 6.25 * height - 5.0 * age + (5.0 if gender_code == 0 else -161.0)
+    return int(bmr * _ACTIVITY_FACTORS[act_idx] + _GOAL_DELTAS[goal_idx])
+
+if njit is not None:
+    _bmr_kernel = njit(cache=True)(_bmr_kernel)
+    # Warm the compile at import so the first click doesn't pay for it
+    _bmr_kernel(25.0, 70.0, 170.0, 0, 0, 1)
+
+# Pure numeric helpers, memoized so identical inputs across Streamlit
+# reruns become cache hits instead of recomputation
+@functools.lru_cache(maxsize=256)
+def _calc_bmi(weight, height, units):
+    """Calculate BMI based on metric or imperial units"""
+    return _BMI_FACTORS[units] * weight / (height * height)
+
+@functools.lru_cache(maxsize=256)
+def _calc_calories(age, weight, height, gender, activity_level, goal):
+    """Calculate daily calorie needs using Mifflin-St Jeor Equation"""
+    return _bmr_kernel(float(age), float(weight), float(height),
+                       _GENDER_CODES.get(gender, 0),
+                       _ACTIVITY_INDEX.get(activity_level, 0),
+                       _GOAL_INDEX.get(goal, 1))
+
+@functools.lru_cache(maxsize=256)
+def _calc_ideal(height, units):
+    """Calculate ideal weight range"""
+    hh = height * height / _BMI_FACTORS[units]
+    return 18.5 * hh, 24.9 * hh
 
 class HealthCalculator:
     def __init__(self):
-        self.bmi_categories = {
-            "Underweight": (0, 18.4),
-            "Normal weight": (18.5, 24.9),
-            "Overweight": (25, 29.9),
-            "Obesity Class I": (30, 34.9),
-            "Obesity Class II": (35, 39.9),
-            "Obesity Class III": (40, float('inf'))
-        }
-
-    def calculate_bmi(self, weight, height, unit_system):
-        """Calculate BMI based on metric or imperial units"""
-        if unit_system == "Metric (kg, cm)":
-            # Convert cm to meters
-            height_m = height / 100
-            bmi = weight / (height_m ** 2)
-        else:  # Imperial (lbs, inches)
-            bmi = (weight / (height ** 2)) * 703
+        self.bmi_categories = BMI_CATEGORIES
 
-        return round(bmi, 1)
+    def calculate_bmi(self, weight, height, units):
+        """Calculate BMI based on metric or imperial units"""
+        return _calc_bmi(weight, height, units)
 
     def get_bmi_category(self, bmi):
         """Determine BMI category"""
-        for category, (min_bmi, max_bmi) in self.bmi_categories.items():
-            if min_bmi <= bmi <= max_bmi:
-                return category
-        return "Unknown"
+        return _BMI_NAMES[bisect.bisect_right(_BMI_BOUNDS, bmi)]
 
     def calculate_calories(self, age, weight, height, gender, activity_level, goal):
         """Calculate daily calorie needs using Mifflin-St Jeor Equation"""
-        if gender == "Male":
-            bmr = 10 * weight + 6.25 * height - 5 * age + 5
-        else:
-            bmr = 10 * weight + 6.25 * height - 5 * age - 161
+        return _calc_calories(age, weight, height, gender, activity_level, goal)
 
-        # Activity multipliers
-        activity_multipliers = {
-            "Sedentary": 1.2,
-            "Lightly active": 1.375,
-            "Moderately active": 1.55,
-            "Very active": 1.725,
-            "Extremely active": 1.9
-        }
+    def calculate_ideal_weight(self, height, units):
+        """Calculate ideal weight range"""
+        return _calc_ideal(height, units)
+
+@st.cache_data
+def _bmi_trend_png():
+    """Render the sample BMI trend chart once and cache the PNG bytes"""
+    # Imported lazily so cold start doesn't pay for matplotlib; cached in
+    # sys.modules after the first Health Analysis visit
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    # float32 ndarrays hit matplotlib's numeric fast path directly,
+    # skipping its internal list-to-array coercion
+    months = np.arange(1, 13)  # Months 1-12
+    month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    sample_bmi = np.asarray([22.5, 22.8, 23.1, 22.9, 23.5, 23.8,
+                             24.1, 24.3, 24.0, 23.8, 23.6, 23.4], dtype=np.float32)
 
-        maintenance_calories = bmr * activity_multipliers.get(activity_level, 1.2)
+    # Create the plot
+    fig, ax = plt.subplots(figsize=(10, 6))
 
-        # Adjust for goal
-        goal_adjustments = {
-            "Lose weight": -500,
-            "Maintain weight": 0,
-            "Gain weight": 500
-        }
+    # Plot the data
+    ax.plot(months, sample_bmi, marker='o', linewidth=2, markersize=6, color='#1f77b4')
 
-        return int(maintenance_calories + goal_adjustments.get(goal, 0))
+    # Add reference lines - single vectorized call instead of three axhlines
+    ys, colors = _BMI_REF_LINES
+    ax.hlines(ys, months[0], months[-1], colors=colors, linestyles='--', alpha=0.7)
 
-    def calculate_ideal_weight(self, height, unit_system):
-        """Calculate ideal weight range"""
-        if unit_system == "Metric (kg, cm)":
-            height_m = height / 100
-            min_ideal = 18.5 * (height_m ** 2)
-            max_ideal = 24.9 * (height_m ** 2)
-        else:
-            min_ideal = (18.5 * (height ** 2)) / 703
-            max_ideal = (24.9 * (height ** 2)) / 703
+    # Add colored regions from the precomputed band table
+    for lo, hi, color, label in _BMI_BANDS:
+        ax.fill_between(months, lo, hi, alpha=0.2, color=color, label=label)
+
+    # Format the plot
+    ax.set_xticks(months)
+    ax.set_xticklabels(month_names)
+    ax.set_xlabel('Month (2024)')
+    ax.set_ylabel('BMI')
+    ax.set_title('Sample BMI Trend Over Time')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    # Adjust layout
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    plt.close(fig)
+    return buf.getvalue()
 
-        return round(min_ideal, 1), round(max_ideal, 1)
+@st.cache_resource
+def get_calculator():
+    """Return a shared HealthCalculator instead of rebuilding one per rerun"""
+    return HealthCalculator()
 
 def main():
-    calculator = HealthCalculator()
+    calculator = get_calculator()
 
     # Header
     st.markdown('<h1 class="main-header">🏥 BMI & Health Calculator</h1>', unsafe_allow_html=True)
@@ -124,6 +267,7 @@ def main():
     else:
         show_about()
 
+@st.fragment
 def show_bmi_calculator(calculator):
     st.header("📊 BMI Calculator")
 
@@ -133,8 +277,9 @@ def show_bmi_calculator(calculator):
         st.subheader("Input Details")
         unit_system = st.radio("Select Unit System",
                               ["Metric (kg, cm)", "Imperial (lbs, inches)"])
+        units = _UNITS_BY_LABEL[unit_system]
 
-        if unit_system == "Metric (kg, cm)":
+        if units == Units.METRIC:
             weight = st.number_input("Weight (kg)", min_value=1.0, max_value=300.0, value=70.0, step=0.1)
             height = st.number_input("Height (cm)", min_value=50.0, max_value=250.0, value=170.0, step=0.1)
         else:
@@ -146,41 +291,35 @@ def show_bmi_calculator(calculator):
 
     with col2:
         if st.button("Calculate BMI", use_container_width=True):
-            bmi = calculator.calculate_bmi(weight, height, unit_system)
-            category = calculator.get_bmi_category(bmi)
-            min_ideal, max_ideal = calculator.calculate_ideal_weight(height, unit_system)
+            # Reuse the last result when the inputs haven't changed, so
+            # navigation-only reruns skip the recompute entirely
+            key = (weight, height, units)
+            if st.session_state.get("_bmi_key") == key:
+                bmi, category, min_ideal, max_ideal = st.session_state["_bmi_result"]
+            else:
+                bmi = calculator.calculate_bmi(weight, height, units)
+                category = calculator.get_bmi_category(bmi)
+                min_ideal, max_ideal = calculator.calculate_ideal_weight(height, units)
+                st.session_state["_bmi_key"] = key
+                st.session_state["_bmi_result"] = (bmi, category, min_ideal, max_ideal)
 
             # Display BMI result with color coding
             st.subheader("Results")
 
             # Color code based on BMI category
-            if category == "Normal weight":
-                css_class = "healthy"
-            elif category in ["Overweight", "Obesity Class I"]:
-                css_class = "overweight"
-            elif category in ["Obesity Class II", "Obesity Class III"]:
-                css_class = "obese"
-            else:
-                css_class = "underweight"
+            css_class = _CATEGORY_CSS.get(category, "underweight")
 
-            st.markdown(f'<div class="bmi-result {css_class}">BMI: {bmi}<br>{category}</div>',
+            st.markdown(f'<div class="bmi-result {css_class}">BMI: {bmi:.1f}<br>{category}</div>',
                        unsafe_allow_html=True)
 
             # Additional information
-            st.info(f"**Ideal weight range:** {min_ideal} - {max_ideal} {'kg' if unit_system == 'Metric (kg, cm)' else 'lbs'}")
+            st.info(f"**Ideal weight range:** {min_ideal:.1f} - {max_ideal:.1f} {'kg' if units == Units.METRIC else 'lbs'}")
 
             # BMI Chart
             st.subheader("BMI Categories")
-            categories = list(calculator.bmi_categories.keys())
-            ranges = [f"{calculator.bmi_categories[cat][0]}-{calculator.bmi_categories[cat][1]}"
-                     for cat in categories]
-
-            chart_data = pd.DataFrame({
-                'Category': categories,
-                'BMI Range': ranges
-            })
-            st.dataframe(chart_data, use_container_width=True)
+            st.table(_BMI_TABLE)
 
+@st.fragment
 def show_calorie_calculator(calculator):
     st.header("🔥 Calorie Calculator")
 
@@ -194,8 +333,9 @@ def show_calorie_calculator(calculator):
         unit_system = st.radio("Unit System",
                               ["Metric (kg, cm)", "Imperial (lbs, inches)"],
                               key="calorie_units")
+        units = _UNITS_BY_LABEL[unit_system]
 
-        if unit_system == "Metric (kg, cm)":
+        if units == Units.METRIC:
             weight = st.number_input("Weight (kg)", min_value=1.0, max_value=300.0, value=70.0, step=0.1, key="calorie_weight")
             height = st.number_input("Height (cm)", min_value=50.0, max_value=250.0, value=170.0, step=0.1, key="calorie_height")
         else:
@@ -216,79 +356,44 @@ def show_calorie_calculator(calculator):
 
         if st.button("Calculate Calories", use_container_width=True):
             # Convert height to cm if imperial
-            if unit_system == "Imperial (lbs, inches)":
+            if units == Units.IMPERIAL:
                 height_cm = height * 2.54
                 weight_kg = weight * 0.453592
             else:
                 height_cm = height
                 weight_kg = weight
 
-            calories = calculator.calculate_calories(age, weight_kg, height_cm, gender, activity_level, goal)
+            # Same input-keyed short-circuit as the BMI page
+            key = (age, weight_kg, height_cm, gender, activity_level, goal)
+            if st.session_state.get("_calorie_key") == key:
+                calories = st.session_state["_calorie_result"]
+            else:
+                calories = calculator.calculate_calories(age, weight_kg, height_cm, gender, activity_level, goal)
+                st.session_state["_calorie_key"] = key
+                st.session_state["_calorie_result"] = calories
 
             st.success(f"**Daily Calorie Needs:** {calories} calories")
 
             # Macronutrient breakdown
             st.subheader("Recommended Macronutrients")
 
-            col_protein, col_carbs, col_fat = st.columns(3)
+            protein_grams = int(calories * 0.3 / 4)
+            carbs_grams = int(calories * 0.50 / 4)
+            fat_grams = int(calories * 0.20 / 9)
 
-            with col_protein:
-                protein_cal = calories * 0.3
-                protein_grams = int(protein_cal / 4)
-                st.metric("Protein", f"{protein_grams}g", "30%")
-
-            with col_carbs:
-                carbs_cal = calories * 0.50
-                carbs_grams = int(carbs_cal / 4)
-                st.metric("Carbohydrates", f"{carbs_grams}g", "50%")
-
-            with col_fat:
-                fat_cal = calories * 0.20
-                fat_grams = int(fat_cal / 9)
-                st.metric("Fat", f"{fat_grams}g", "20%")
+            st.markdown(_MACRO_HTML.format(protein_grams=protein_grams,
+                                           carbs_grams=carbs_grams,
+                                           fat_grams=fat_grams),
+                        unsafe_allow_html=True)
 
+@st.fragment
 def show_health_analysis(calculator):
     st.header("📈 Health Analysis")
 
     st.subheader("BMI Trend Analysis")
 
-    # FIXED: Generate sample data with proper date handling
-    months = list(range(1, 13))  # Months 1-12
-    month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    sample_bmi = [22.5, 22.8, 23.1, 22.9, 23.5, 23.8, 24.1, 24.3, 24.0, 23.8, 23.6, 23.4]
-
-    # Create the plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Plot the data
-    ax.plot(months, sample_bmi, marker='o', linewidth=2, markersize=6, color='#1f77b4')
-    
-    # Add reference lines
-    ax.axhline(y=18.5, color='red', linestyle='--', alpha=0.7, label='Underweight')
-    ax.axhline(y=24.9, color='green', linestyle='--', alpha=0.7, label='Normal')
-    ax.axhline(y=29.9, color='orange', linestyle='--', alpha=0.7, label='Overweight')
-
-    # Add colored regions - FIXED: Use proper x ranges
-    ax.fill_between(months, 18.5, 24.9, alpha=0.2, color='green', label='Healthy Range')
-    ax.fill_between(months, 25, 29.9, alpha=0.2, color='orange', label='Overweight Range')
-    ax.fill_between(months, 0, 18.4, alpha=0.2, color='red', label='Underweight Range')
-    ax.fill_between(months, 30, 40, alpha=0.2, color='darkred', label='Obesity Range')
-
-    # Format the plot
-    ax.set_xticks(months)
-    ax.set_xticklabels(month_names)
-    ax.set_xlabel('Month (2024)')
-    ax.set_ylabel('BMI')
-    ax.set_title('Sample BMI Trend Over Time')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    
-    # Adjust layout
-    plt.tight_layout()
-    
-    # Display the plot
-    st.pyplot(fig)
+    # Display the cached chart
+    st.image(_bmi_trend_png())
 
     # Interactive BMI Calculator in Health Analysis
     st.subheader("📊 Calculate Your Current BMI")
@@ -302,8 +407,7 @@ def show_health_analysis(calculator):
     with col2:
         if st.button("Check My BMI", key="health_bmi_button"):
             current_bmi = current_weight / ((current_height/100) ** 2)
-            current_bmi = round(current_bmi, 1)
-            
+
             # Determine category
             if current_bmi < 18.5:
                 current_category = "Underweight"
@@ -320,7 +424,7 @@ def show_health_analysis(calculator):
             
             st.markdown(f"""
             <div style='background-color: {color}; padding: 20px; border-radius: 10px; text-align: center;'>
-                <h3>Your Current BMI: {current_bmi}</h3>
+                <h3>Your Current BMI: {current_bmi:.1f}</h3>
                 <h4>{current_category}</h4>
             </div>
             """, unsafe_allow_html=True)